@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Per-connection state for the Vosk WebSocket server
+"""
+import os
+import time
+from collections import OrderedDict
+
+from endpointing import SilenceEndpointer, LatencyStats
+from tracing import NULL_TRACER
+
+class UtteranceCache:
+    """Recent finals by utterance id, with lazily computed suggestions and a TTL"""
+
+    def __init__(self, ttl=None, max_entries=100):
+        self.ttl = ttl if ttl is not None else float(os.environ.get("STT_SUGGESTION_TTL", "300"))
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.next_id = 1
+
+    def add(self, text):
+        """Register a final and return its utterance id"""
+        utterance_id = str(self.next_id)
+        self.next_id += 1
+        self.entries[utterance_id] = {"text": text, "suggestions": None, "expires": time.monotonic() + self.ttl}
+        self._evict()
+        return utterance_id
+
+    def get(self, utterance_id):
+        """Entry for an utterance, or None if unknown or expired"""
+        self._evict()
+        return self.entries.get(str(utterance_id))
+
+    def _evict(self):
+        now = time.monotonic()
+        while self.entries:
+            oldest = next(iter(self.entries.values()))
+            if len(self.entries) <= self.max_entries and oldest["expires"] > now:
+                break
+            self.entries.popitem(last=False)
+
+class ClientSession:
+    """Everything that belongs to a single WebSocket stream"""
+
+    def __init__(self, websocket, client_id, model_handle, rec, model_type, sample_rate=16000):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.model_handle = model_handle
+        self.rec = rec
+        self.model_type = model_type
+        self.endpointer = SilenceEndpointer(sample_rate)
+        self.latency = LatencyStats(max_samples=200)
+        self.last_partial_at = 0.0
+        self.tracer = NULL_TRACER
+        self.utterances = UtteranceCache()
+        self.imports = {}  # In-progress chunked vocabulary uploads by upload_id
+        self.overlay = None  # Session-only VocabularyOverlay, released on disconnect
+        self.closed = False  # Set once sending fails; queued final work is then dropped
+        
+        # Dual-model mode only: small-model recognizer and the final decode queue
+        self.partial_handle = None
+        self.partial_rec = None
+        self.final_queue = None
+        self.final_task = None
@@ -6,23 +6,45 @@ import asyncio
 import requests
 import json
 import re
+import math
+import os
 import time
-import feedparser
-from bs4 import BeautifulSoup
 from collections import Counter, defaultdict
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Common English words that are never tech terms
+COMMON_WORDS = frozenset({
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had',
+    'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his',
+    'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy',
+    'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use'
+})
+
+# Tech terms often have certain patterns, compiled once into a single regex:
+# ends with js/api/db/sql/css/ml/ai/ops/lang (reactjs, mongodb, devops, golang)
+# or starts with micro/web/dev (microservices, websocket, devops)
+TECH_PATTERN = re.compile(r'^(?:micro|web|dev)|(?:js|api|db|sql|css|ml|ai|ops|lang)$')
+DIGIT_PATTERN = re.compile(r'\d')
+WORD_PATTERN = re.compile(r'\b[a-zA-Z][a-zA-Z0-9]*[a-zA-Z]\b')
+
+# Known file extensions or protocols
+EXTENSIONS = frozenset({'json', 'xml', 'yaml', 'toml', 'csv', 'sql', 'html', 'css'})
+
 class DynamicVocabularyManager:
     """Automatically discovers and learns new tech vocabulary"""
     
     def __init__(self):
         self.tech_terms = set()
+        self.terms_by_length = defaultdict(set)  # Lookup index for fuzzy matching
         self.trending_terms = Counter()
         self.last_update = 0
         self.update_interval = 3600  # Update every hour
         
+        # Optional SharedCorrectionCache used to share terms across replicas
+        self.shared_cache = None
+        
         # Initialize with basic terms
         self._load_base_vocabulary()
         
@@ -53,10 +75,11 @@ class DynamicVocabularyManager:
             'api', 'rest', 'graphql', 'grpc', 'json', 'xml', 'yaml',
             'oauth', 'jwt', 'ssl', 'tls', 'websocket', 'cors'
         }
-        self.tech_terms.update(base_terms)
+        self._store_terms(base_terms)
         
     async def fetch_trending_tech_terms(self):
         """Fetch trending tech terms from various sources"""
+        known_terms = set(self.tech_terms)
         try:
             await asyncio.gather(
                 self._fetch_from_github_trending(),
@@ -65,6 +88,7 @@ class DynamicVocabularyManager:
                 return_exceptions=True
             )
             logger.info(f"Updated vocabulary: {len(self.tech_terms)} terms")
+            self._on_terms_added(self.tech_terms - known_terms)
         except Exception as e:
             logger.error(f"Error fetching trending terms: {e}")
     
@@ -113,7 +137,7 @@ class DynamicVocabularyManager:
                 for tag in data.get('items', []):
                     tag_name = tag.get('name', '').lower()
                     if self._is_valid_tech_term(tag_name):
-                        self.tech_terms.add(tag_name)
+                        self._store_terms([tag_name])
                         self.trending_terms[tag_name] += tag.get('count', 0)
         except Exception as e:
             logger.debug(f"StackOverflow API error: {e}")
@@ -124,11 +148,11 @@ class DynamicVocabularyManager:
             return
             
         # Clean and split text
-        words = re.findall(r'\b[a-zA-Z][a-zA-Z0-9]*[a-zA-Z]\b', text.lower())
+        words = WORD_PATTERN.findall(text.lower())
         
         for word in words:
             if self._is_valid_tech_term(word):
-                self.tech_terms.add(word)
+                self._store_terms([word])
                 self.trending_terms[word] += 1
     
     def _is_valid_tech_term(self, term):
@@ -137,46 +161,19 @@ class DynamicVocabularyManager:
             return False
             
         # Skip common English words
-        common_words = {
-            'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had',
-            'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his',
-            'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy',
-            'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use'
-        }
-        
-        if term in common_words:
+        if term in COMMON_WORDS:
             return False
             
         # Tech terms often have certain patterns
-        tech_patterns = [
-            r'.*js$',      # ends with js (reactjs, vuejs)
-            r'.*api$',     # ends with api
-            r'.*db$',      # ends with db (mongodb)
-            r'.*sql$',     # ends with sql
-            r'.*css$',     # ends with css
-            r'.*ml$',      # ends with ml
-            r'.*ai$',      # ends with ai
-            r'^micro.*',   # starts with micro (microservices)
-            r'^web.*',     # starts with web (websocket)
-            r'^dev.*',     # starts with dev (devops)
-            r'.*ops$',     # ends with ops (devops, gitops)
-            r'.*lang$',    # ends with lang (golang)
-        ]
-        
-        for pattern in tech_patterns:
-            if re.match(pattern, term):
-                return True
+        if TECH_PATTERN.search(term):
+            return True
                 
         # Check if it contains numbers (version indicators)
-        if re.search(r'\d', term) and len(term) > 3:
+        if len(term) > 3 and DIGIT_PATTERN.search(term):
             return True
             
         # Check if it's a known file extension or protocol
-        extensions = {'json', 'xml', 'yaml', 'toml', 'csv', 'sql', 'html', 'css'}
-        if term in extensions:
-            return True
-            
-        return False
+        return term in EXTENSIONS
     
     async def auto_update(self):
         """Automatically update vocabulary periodically"""
@@ -184,8 +181,12 @@ class DynamicVocabularyManager:
             try:
                 current_time = time.time()
                 if current_time - self.last_update > self.update_interval:
-                    logger.info("🔄 Updating tech vocabulary...")
-                    await self.fetch_trending_tech_terms()
+                    # With a shared cache only one replica fetches; the rest sync its terms
+                    if self.shared_cache and not await self.shared_cache.try_claim("trending_fetch", self.update_interval):
+                        logger.debug("Trending fetch claimed by another replica")
+                    else:
+                        logger.info("🔄 Updating tech vocabulary...")
+                        await self.fetch_trending_tech_terms()
                     self.last_update = current_time
                     
                     # Log some trending terms
@@ -202,13 +203,128 @@ class DynamicVocabularyManager:
         """Get current vocabulary set"""
         return self.tech_terms.copy()
     
+    def has_term(self, term):
+        """Membership check without copying the vocabulary"""
+        return term in self.tech_terms
+    
     def add_terms(self, terms):
         """Manually add terms"""
         if isinstance(terms, str):
             terms = [terms]
+        self.add_terms_batch(terms)
+    
+    def add_terms_batch(self, terms, invalidate=True):
+        """Validate and add a batch of terms; returns (valid, added) counts"""
+        valid = {term for term in (t.strip().lower() for t in terms if t) if self._is_valid_tech_term(term)}
+        added = self._store_terms(valid)
+        self._on_terms_added(added, invalidate)
+        return len(valid), len(added)
+    
+    def learn_terms(self, terms):
+        """Add terms learned from corrections, invalidating only the memoized words they affect"""
+        valid = {term for term in (t.lower() for t in terms) if self._is_valid_tech_term(term)}
+        added = self._store_terms(valid)
+        self._on_terms_added(added, invalidate=False)
+        if added and self.shared_cache:
+            self.shared_cache.drop(self._similar_cached_words(added))
+    
+    async def import_terms(self, terms, batch_size=5000, on_progress=None, progress=None, invalidate=True):
+        """Stream terms in, validating and indexing one batch at a time without blocking the loop"""
+        progress = progress or ImportProgress()
+        added_before = progress.added
+        batch = []
+        for term in terms:
+            batch.append(term)
+            if len(batch) >= batch_size:
+                await self._import_batch(batch, progress, on_progress)
+                batch = []
+        if batch:
+            await self._import_batch(batch, progress, on_progress)
+        if invalidate and progress.added > added_before:
+            self._invalidate_corrections()
+        return progress
+    
+    def finish_import(self, progress):
+        """End a chunked import: one correction-cache invalidation for the whole upload"""
+        progress.done = True
+        if progress.added:
+            self._invalidate_corrections()
+    
+    async def import_terms_file(self, path, batch_size=5000, on_progress=None):
+        """Import a glossary file (one term per line, '#' comments) in streamed batches"""
+        loop = asyncio.get_running_loop()
+        progress = ImportProgress()
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            while True:
+                # File reads happen off the loop; validation and indexing on it, between yields
+                lines = await loop.run_in_executor(None, _read_lines, f, batch_size)
+                if not lines:
+                    break
+                batch = [line for line in lines if line and not line.startswith('#')]
+                progress.skipped += len(lines) - len(batch)
+                await self._import_batch(batch, progress, on_progress)
+        self.finish_import(progress)
+        logger.info(f"📚 Imported {path}: {progress.to_dict()}")
+        return progress
+    
+    async def _import_batch(self, batch, progress, on_progress):
+        # Memoized corrections are invalidated once per import, not per batch
+        valid, added = self.add_terms_batch(batch, invalidate=False)
+        progress.record(len(batch), valid, added)
+        if on_progress:
+            await on_progress(progress)
+        await asyncio.sleep(0)  # Let audio streams run between batches
+    
+    def merge_shared_terms(self, terms):
+        """Merge terms learned by other replicas (already validated there)"""
+        added = self._store_terms(terms)
+        if added and self.shared_cache:
+            # Explicit additions bump the shared generation at their origin; this
+            # covers terms another replica learned from its corrections
+            if len(added) <= 100:
+                self.shared_cache.drop(self._similar_cached_words(added))
+            else:
+                self.shared_cache.invalidate_local()
+        return len(added)
+    
+    def candidate_terms(self, term, score_cutoff):
+        """Terms whose length allows a fuzz.ratio score >= score_cutoff against term"""
+        return _length_candidates(self.terms_by_length, term, score_cutoff)
+    
+    def create_overlay(self, terms=()):
+        """Per-session vocabulary layered over this shared vocabulary"""
+        return VocabularyOverlay(terms)
+    
+    def _store_terms(self, terms):
+        """Add already-validated terms, updating lookup indexes incrementally"""
+        added = set()
+        for term in terms:
+            if term not in self.tech_terms:
+                self.tech_terms.add(term)
+                self.terms_by_length[len(term)].add(term)
+                added.add(term)
+        return added
+    
+    def _on_terms_added(self, terms, invalidate=True):
+        """Share new terms and retire memoized corrections that may now be stale"""
+        if terms and self.shared_cache:
+            self.shared_cache.share_terms(terms)
+            if invalidate:
+                self.shared_cache.bump_generation()
+    
+    def _invalidate_corrections(self):
+        if self.shared_cache:
+            self.shared_cache.bump_generation()
+    
+    def _similar_cached_words(self, terms):
+        """Memoized words a new term could now fuzzy-match (same cutoff as the corrector)"""
+        from rapidfuzz import process, fuzz
+        cached_words = list(self.shared_cache.local)
+        affected = set(terms)
         for term in terms:
-            if self._is_valid_tech_term(term.lower()):
-                self.tech_terms.add(term.lower())
+            matches = process.extract(term, cached_words, scorer=fuzz.ratio, limit=None, score_cutoff=75)
+            affected.update(match[0] for match in matches)
+        return affected
     
     def search_similar_terms(self, term, limit=5):
         """Find similar terms in vocabulary"""
@@ -220,4 +336,91 @@ class DynamicVocabularyManager:
             limit=limit,
             score_cutoff=60
         )
-        return [match[0] for match in matches]
\ No newline at end of file
+        return [match[0] for match in matches]
+
+class VocabularyOverlay:
+    """Session-only terms (e.g. from the interview question); memory is O(overlay)"""
+    
+    def __init__(self, terms=(), max_terms=None):
+        self.max_terms = max_terms or int(os.environ.get("STT_MAX_OVERLAY_TERMS", "5000"))
+        self.terms = set()
+        self.terms_by_length = defaultdict(set)
+        self.add_terms(terms)
+    
+    def add_terms(self, terms):
+        """Add session terms; no tech-pattern validation since they are chosen explicitly"""
+        if isinstance(terms, str):
+            terms = [terms]
+        added = 0
+        for term in terms:
+            term = str(term).strip().lower()
+            if len(term) < 2 or term in self.terms or len(self.terms) >= self.max_terms:
+                continue
+            self.terms.add(term)
+            self.terms_by_length[len(term)].add(term)
+            added += 1
+        return added
+    
+    def clear(self):
+        self.terms.clear()
+        self.terms_by_length.clear()
+    
+    def candidate_terms(self, term, score_cutoff):
+        return _length_candidates(self.terms_by_length, term, score_cutoff)
+    
+    def __contains__(self, term):
+        return term in self.terms
+    
+    def __len__(self):
+        return len(self.terms)
+
+class ImportProgress:
+    """Running totals for a bulk vocabulary import"""
+    
+    def __init__(self):
+        self.processed = 0
+        self.valid = 0
+        self.added = 0
+        self.skipped = 0
+        self.done = False
+        self.started = time.perf_counter()
+    
+    def record(self, processed, valid, added):
+        self.processed += processed
+        self.valid += valid
+        self.added += added
+    
+    def to_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "processed": self.processed,
+            "valid": self.valid,
+            "added": self.added,
+            "skipped": self.skipped,
+            "done": self.done,
+            "elapsed_seconds": round(elapsed, 2),
+            "terms_per_second": round(self.processed / elapsed) if elapsed > 0 else None
+        }
+
+def _length_candidates(terms_by_length, term, score_cutoff):
+    """Terms from a length index that could reach score_cutoff with fuzz.ratio"""
+    # ratio <= 2*min(a, b) / (a + b), so lengths outside this band can't reach the cutoff
+    cutoff = score_cutoff / 100.0
+    length = len(term)
+    if cutoff <= 0:
+        return [t for terms in terms_by_length.values() for t in terms]
+    shortest = math.ceil(length * cutoff / (2 - cutoff))
+    longest = math.floor(length * (2 - cutoff) / cutoff)
+    candidates = []
+    for size in range(max(1, shortest), longest + 1):
+        candidates.extend(terms_by_length.get(size, ()))
+    return candidates
+
+def _read_lines(f, count):
+    """Read up to count stripped lines from an open file"""
+    lines = []
+    for line in f:
+        lines.append(line.strip())
+        if len(lines) >= count:
+            break
+    return lines
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Server-side silence endpointing for low-latency final results
+"""
+import math
+import os
+import time
+from array import array
+from collections import deque
+
+class SilenceEndpointer:
+    """Detects trailing silence in 16-bit PCM so a final can be forced early"""
+
+    def __init__(self, sample_rate=16000, enabled=None, silence_ms=None, energy_threshold=None):
+        self.sample_rate = sample_rate
+        self.enabled = os.environ.get("STT_LOW_LATENCY", "0") == "1" if enabled is None else enabled
+        self.silence_ms = silence_ms if silence_ms is not None else int(os.environ.get("STT_SILENCE_MS", "500"))
+        self.energy_threshold = energy_threshold if energy_threshold is not None else int(os.environ.get("STT_ENERGY_THRESHOLD", "300"))
+        self.reset()
+
+    def reset(self):
+        """Forget the current utterance (call after every final)"""
+        self.speech_seen = False
+        self.trailing_silence_ms = 0.0
+        self.end_of_speech = None
+
+    def configure(self, enabled=None, silence_ms=None, energy_threshold=None):
+        """Update per-connection settings"""
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if silence_ms is not None:
+            self.silence_ms = max(100, int(silence_ms))
+        if energy_threshold is not None:
+            self.energy_threshold = max(0, int(energy_threshold))
+
+    def get_settings(self):
+        return {
+            "enabled": self.enabled,
+            "silence_ms": self.silence_ms,
+            "energy_threshold": self.energy_threshold
+        }
+
+    def process(self, chunk: bytes) -> bool:
+        """Track speech/silence for a chunk; True when a final should be forced"""
+        samples = array('h')
+        samples.frombytes(chunk[:len(chunk) - len(chunk) % 2])
+        if not samples:
+            return False
+
+        now = time.perf_counter()
+        if self._rms(samples) >= self.energy_threshold:
+            self.speech_seen = True
+            self.trailing_silence_ms = 0.0
+            self.end_of_speech = now
+            return False
+
+        self.trailing_silence_ms += len(samples) * 1000.0 / self.sample_rate
+        return self.enabled and self.speech_seen and self.trailing_silence_ms >= self.silence_ms
+
+    def _rms(self, samples):
+        # Every 4th sample is plenty for a speech/silence decision
+        subset = samples[::4]
+        return math.sqrt(sum(s * s for s in subset) / len(subset))
+
+class LatencyStats:
+    """Rolling "end of speech → final sent" latency samples"""
+
+    def __init__(self, max_samples=1000):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.forced_count = 0
+
+    def record(self, end_of_speech, forced=False):
+        """Record latency from the end-of-speech timestamp to now"""
+        if end_of_speech is None:
+            return None
+        latency_ms = (time.perf_counter() - end_of_speech) * 1000.0
+        self.samples.append(latency_ms)
+        self.count += 1
+        if forced:
+            self.forced_count += 1
+        return latency_ms
+
+    def summary(self):
+        if not self.samples:
+            return {"count": self.count, "forced_count": self.forced_count}
+
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "forced_count": self.forced_count,
+            "mean_ms": round(sum(ordered) / len(ordered), 1),
+            "p50_ms": round(ordered[len(ordered) // 2], 1),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+            "max_ms": round(ordered[-1], 1)
+        }
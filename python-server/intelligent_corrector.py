@@ -3,23 +3,31 @@
 Intelligent corrector that uses context and external services
 """
 import asyncio
-import aiohttp
 import json
 import re
 import logging
 from typing import List, Optional
 from rapidfuzz import fuzz, process
 
+from shared_cache import SharedCorrectionCache, NO_CORRECTION
+from tracing import NULL_TRACER
+
 logger = logging.getLogger(__name__)
 
 class IntelligentCorrector:
     """AI-powered text correction with context awareness"""
     
-    def __init__(self, vocab_manager):
+    def __init__(self, vocab_manager, cache=None):
         self.vocab_manager = vocab_manager
         self.context_window = []
         self.session = None
         
+        # Memoized vocabulary matches (local LRU, optionally shared via Redis); the
+        # vocabulary manager needs the same cache so term changes invalidate it
+        self.cache = cache or vocab_manager.shared_cache or SharedCorrectionCache()
+        if vocab_manager.shared_cache is None:
+            vocab_manager.shared_cache = self.cache
+        
         # Common phonetic replacements for tech terms
         self.phonetic_mappings = {
             # Letter-by-letter spellings
@@ -61,6 +69,8 @@ class IntelligentCorrector:
         }
     
     async def __aenter__(self):
+        # Imported on first use; only needed for external correction services
+        import aiohttp
         self.session = aiohttp.ClientSession()
         return self
         
@@ -91,36 +101,83 @@ class IntelligentCorrector:
         # Extract potential tech terms from context
         words = re.findall(r'\b[a-zA-Z][a-zA-Z0-9]*\b', context_text)
         for word in words:
-            if word in self.vocab_manager.get_vocabulary():
+            if self.vocab_manager.has_term(word):
                 context_terms.add(word)
         
         return context_terms
     
-    def _intelligent_word_correction(self, word: str) -> str:
-        """Intelligently correct a single word using multiple strategies"""
-        clean_word = re.sub(r'[^\w]', '', word.lower())
-        
-        if not clean_word or len(clean_word) < 2:
-            return word
+    def _clean_word(self, word: str) -> str:
+        return re.sub(r'[^\w]', '', word.lower())
+    
+    def _vocabulary_match(self, clean_word: str) -> str:
+        """Strategies 1-2: exact or fuzzy vocabulary match (context-free, so memoizable)"""
+        tech_vocab = self.vocab_manager.tech_terms
         
         # Strategy 1: Exact match in tech vocabulary
-        if clean_word in self.vocab_manager.get_vocabulary():
-            return word  # Already correct
+        if clean_word in tech_vocab:
+            return clean_word  # Already correct
         
-        # Strategy 2: Fuzzy match against tech terms
-        tech_vocab = self.vocab_manager.get_vocabulary()
+        # Strategy 2: Fuzzy match against tech terms (length-pruned candidates)
         if tech_vocab:
             matches = process.extract(
                 clean_word,
-                tech_vocab,
+                self.vocab_manager.candidate_terms(clean_word, 75),
                 scorer=fuzz.ratio,
                 limit=1,
                 score_cutoff=75
             )
             if matches:
-                best_match = matches[0][0]
-                # Preserve original case and punctuation
-                return word.replace(clean_word, best_match)
+                return matches[0][0]
+        
+        return NO_CORRECTION
+    
+    def _overlay_match(self, clean_word: str, overlay) -> Optional[str]:
+        """Exact or fuzzy match against a session's overlay vocabulary"""
+        if clean_word in overlay:
+            return clean_word
+        if not len(overlay):
+            return None
+        matches = process.extract(
+            clean_word,
+            overlay.candidate_terms(clean_word, 75),
+            scorer=fuzz.ratio,
+            limit=1,
+            score_cutoff=75
+        )
+        return matches[0][0] if matches else None
+    
+    def _intelligent_word_correction(self, word: str, memo: Optional[dict] = None, overlay=None) -> str:
+        """Intelligently correct a single word using multiple strategies"""
+        clean_word = self._clean_word(word)
+        
+        if not clean_word or len(clean_word) < 2:
+            return word
+        
+        # Exact session overlay term: already correct
+        if overlay is not None and clean_word in overlay:
+            return word
+        
+        # Strategies 1-2, memoized per clean word
+        if memo is not None and clean_word in memo:
+            match = memo[clean_word]
+        else:
+            match = self._vocabulary_match(clean_word)
+            if memo is not None:
+                memo[clean_word] = match
+        
+        if match == clean_word:
+            return word  # Already correct
+        
+        # Session overlay fuzzy matches beat global fuzzy matches, never exact words
+        # (not memoized, they are per-session)
+        if overlay is not None:
+            overlay_match = self._overlay_match(clean_word, overlay)
+            if overlay_match:
+                return word.replace(clean_word, overlay_match)
+        
+        if match:
+            # Preserve original case and punctuation
+            return word.replace(clean_word, match)
         
         # Strategy 3: Context-based correction
         context_terms = self._get_context_terms()
@@ -184,7 +241,7 @@ class IntelligentCorrector:
             logger.debug(f"AI correction failed: {e}")
             return None
     
-    async def correct_text(self, text: str) -> str:
+    async def correct_text(self, text: str, tracer=NULL_TRACER, overlay=None) -> str:
         """Main correction method with multiple strategies"""
         if not text or len(text.strip()) < 2:
             return text
@@ -192,20 +249,31 @@ class IntelligentCorrector:
         original_text = text
         
         # Step 1: Apply phonetic corrections
-        corrected = self._apply_phonetic_corrections(text)
+        with tracer.span("correct.phonetic"):
+            corrected = self._apply_phonetic_corrections(text)
         
-        # Step 2: Word-by-word intelligent correction
+        # Step 2: Word-by-word intelligent correction (one cache lookup for the utterance)
         words = corrected.split()
+        clean_words = {self._clean_word(word) for word in words}
+        clean_words = [word for word in clean_words if len(word) >= 2]
+        with tracer.span("correct.cache_lookup", words=len(clean_words)):
+            memo = await self.cache.get_many(clean_words)
+        tag = self.cache.current_tag()
+        cached = set(memo)
         corrected_words = []
         
-        for word in words:
-            corrected_word = self._intelligent_word_correction(word)
-            corrected_words.append(corrected_word)
+        with tracer.span("correct.words", words=len(words), cached=len(cached)):
+            for word in words:
+                corrected_word = self._intelligent_word_correction(word, memo, overlay)
+                corrected_words.append(corrected_word)
+        
+        self.cache.put_many({word: memo[word] for word in memo.keys() - cached}, tag)
         
         corrected = ' '.join(corrected_words)
         
         # Step 3: Try AI-powered correction if available
-        ai_corrected = await self.correct_text_with_ai(corrected)
+        with tracer.span("correct.ai"):
+            ai_corrected = await self.correct_text_with_ai(corrected)
         if ai_corrected and ai_corrected != corrected:
             corrected = ai_corrected
         
@@ -213,11 +281,12 @@ class IntelligentCorrector:
         self.add_context(corrected)
         
         # Update vocabulary with new terms that appear correct
-        self._learn_from_correction(original_text, corrected)
+        with tracer.span("correct.learn"):
+            self._learn_from_correction(original_text, corrected, overlay)
         
         return corrected
     
-    def _learn_from_correction(self, original: str, corrected: str):
+    def _learn_from_correction(self, original: str, corrected: str, overlay=None):
         """Learn new patterns from corrections"""
         if original == corrected:
             return
@@ -226,11 +295,14 @@ class IntelligentCorrector:
         orig_words = set(re.findall(r'\b[a-zA-Z][a-zA-Z0-9]*\b', original.lower()))
         corr_words = set(re.findall(r'\b[a-zA-Z][a-zA-Z0-9]*\b', corrected.lower()))
         
-        # Add new corrected words to vocabulary if they look like tech terms
+        # Add new corrected words to vocabulary if they look like tech terms;
+        # session overlay terms stay with that session and are never learned globally
         new_words = corr_words - orig_words
+        if overlay is not None:
+            new_words = {word for word in new_words if word not in overlay}
         for word in new_words:
             if self.vocab_manager._is_valid_tech_term(word):
-                self.vocab_manager.add_terms([word])
+                self.vocab_manager.learn_terms([word])
                 logger.debug(f"Learned new term: {word}")
     
     def get_correction_suggestions(self, text: str, limit: int = 3) -> List[str]:
@@ -252,7 +324,7 @@ class IntelligentCorrector:
             score_cutoff=60
         )
         
-        for match, score in phrase_matches:
+        for match, score, _ in phrase_matches:
             if match not in suggestions:
                 suggestions.append(match)
         
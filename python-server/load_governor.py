@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Admission control and graceful degradation driven by decode speed and event-loop lag
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Degradation levels, each one includes everything below it
+LEVEL_NORMAL = 0
+LEVEL_REDUCED_PARTIALS = 1
+LEVEL_NO_CORRECTION = 2
+LEVEL_FALLBACK_MODEL = 3
+
+LEVEL_NAMES = {
+    LEVEL_NORMAL: "normal",
+    LEVEL_REDUCED_PARTIALS: "reduced_partials",
+    LEVEL_NO_CORRECTION: "no_correction",
+    LEVEL_FALLBACK_MODEL: "fallback_model"
+}
+
+class LoadGovernor:
+    """Caps concurrent streams and steps service down before the box saturates"""
+
+    # Level entered once real-time factor / loop lag (ms) exceeds these values
+    RTF_THRESHOLDS = (0.5, 0.7, 0.85)
+    LAG_THRESHOLDS = (50.0, 120.0, 250.0)
+
+    def __init__(self):
+        self.max_streams = int(os.environ.get("STT_MAX_STREAMS", (os.cpu_count() or 2) * 4))
+        self.max_queue = int(os.environ.get("STT_MAX_QUEUE", "10"))
+        self.queue_timeout = float(os.environ.get("STT_QUEUE_TIMEOUT", "30"))
+        self.recover_seconds = float(os.environ.get("STT_RECOVER_SECONDS", "10"))
+        self.reduced_partial_interval = float(os.environ.get("STT_DEGRADED_PARTIAL_INTERVAL", "0.5"))
+
+        # Set by the server when a smaller model can take new sessions under load
+        self.fallback_available = False
+
+        self.active_streams = 0
+        self.waiters = deque()
+        self.level = LEVEL_NORMAL
+        self.rtf = 0.0
+        self.loop_lag_ms = 0.0
+        self.rejected = 0
+        self._below_since = None
+        self._decoded = False
+        self._monitor_task = None
+
+    def start(self, interval=0.5):
+        """Start the event-loop lag monitor (needs a running loop)"""
+        if self._monitor_task is None:
+            self._monitor_task = asyncio.create_task(self._monitor(interval))
+
+    async def admit(self, on_queued=None):
+        """Reserve a stream slot, waiting in a bounded queue; False if rejected"""
+        if self._has_capacity() and not self.waiters:
+            self.active_streams += 1
+            return True
+
+        if len(self.waiters) >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+
+        try:
+            if on_queued:
+                await on_queued(len(self.waiters))
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            # Client went away after being handed a slot: give it back
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        except Exception:
+            # Could not tell the client it was queued (it disconnected)
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            return False
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+    def release(self):
+        """Free a stream slot and hand it to the next queued connection"""
+        self.active_streams = max(0, self.active_streams - 1)
+        self._wake_waiters()
+
+    def record_decode(self, decode_seconds, audio_seconds):
+        """Feed one recognizer call into the real-time factor average"""
+        if audio_seconds > 0:
+            self.rtf = 0.9 * self.rtf + 0.1 * (decode_seconds / audio_seconds)
+            self._decoded = True
+
+    @property
+    def partial_interval(self):
+        """Minimum seconds between partials for a stream"""
+        return self.reduced_partial_interval if self.level >= LEVEL_REDUCED_PARTIALS else 0.0
+
+    @property
+    def correction_enabled(self):
+        return self.level < LEVEL_NO_CORRECTION
+
+    @property
+    def use_fallback_model(self):
+        return self.level >= LEVEL_FALLBACK_MODEL
+
+    def get_status(self):
+        return {
+            "level": self.level,
+            "level_name": LEVEL_NAMES[self.level],
+            "active_streams": self.active_streams,
+            "max_streams": self.max_streams,
+            "queued": len(self.waiters),
+            "rejected": self.rejected,
+            "rtf": round(self.rtf, 3),
+            "loop_lag_ms": round(self.loop_lag_ms, 1)
+        }
+
+    def _has_capacity(self):
+        # At the last level, without a smaller model to fall back to, new streams wait
+        if self.level >= LEVEL_FALLBACK_MODEL and not self.fallback_available and self.active_streams > 0:
+            return False
+        return self.active_streams < self.max_streams
+
+    def _wake_waiters(self):
+        while self.waiters and self._has_capacity():
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.active_streams += 1
+                waiter.set_result(True)
+
+    async def _monitor(self, interval):
+        loop = asyncio.get_running_loop()
+        samples = deque(maxlen=10)
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            samples.append(max(0.0, loop.time() - started - interval) * 1000.0)
+            self.loop_lag_ms = max(samples)
+            # Without fresh audio the average would never drop, so let it decay
+            if not self._decoded:
+                self.rtf *= 0.8
+            self._decoded = False
+            self._update_level()
+
+    def _update_level(self):
+        target = max(self._level_for(self.rtf, self.RTF_THRESHOLDS),
+                     self._level_for(self.loop_lag_ms, self.LAG_THRESHOLDS))
+
+        if target > self.level:
+            self._set_level(target)
+            self._below_since = None
+        elif target < self.level:
+            # Step down one level at a time once load stays low
+            now = time.monotonic()
+            if self._below_since is None:
+                self._below_since = now
+            elif now - self._below_since >= self.recover_seconds:
+                self._set_level(self.level - 1)
+                self._below_since = now
+        else:
+            self._below_since = None
+
+    def _level_for(self, value, thresholds):
+        level = LEVEL_NORMAL
+        for index, threshold in enumerate(thresholds):
+            if value >= threshold:
+                level = index + 1
+        return level
+
+    def _set_level(self, level):
+        previous = self.level
+        self.level = level
+        if level > previous:
+            logger.warning(f"🔥 Load level {LEVEL_NAMES[previous]} → {LEVEL_NAMES[level]} "
+                           f"(rtf={self.rtf:.2f}, lag={self.loop_lag_ms:.0f}ms)")
+        else:
+            logger.info(f"🌿 Load level {LEVEL_NAMES[previous]} → {LEVEL_NAMES[level]}")
+            self._wake_waiters()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Model manager that hot-swaps Vosk models while live streams drain on the old one
+"""
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+
+import vosk
+
+logger = logging.getLogger(__name__)
+
+class LoadedModel:
+    """A loaded Vosk model plus the number of recognizers still using it"""
+
+    def __init__(self, model, model_path):
+        self.model = model
+        self.model_path = str(model_path)
+        self.name = Path(model_path).name
+        self.loaded_at = time.time()
+        self.active_streams = 0
+        self.retired = False
+
+class ModelManager:
+    """Owns the current model and retires old ones once their last stream ends"""
+
+    def __init__(self):
+        self.current = None
+        self.draining = []
+        self._reload_lock = asyncio.Lock()
+
+    def load(self, model_path):
+        """Load a model synchronously and make it current (used at startup)"""
+        self._swap(self._load_model(model_path))
+        return self.current
+
+    async def reload(self, model_path=None):
+        """Load a model in a worker thread, then switch new connections to it"""
+        if model_path is None:
+            model_path = self.current.model_path if self.current else None
+        if model_path is None:
+            raise ValueError("No model path given and no model currently loaded")
+
+        async with self._reload_lock:
+            loop = asyncio.get_running_loop()
+            loaded = await loop.run_in_executor(None, self._load_model, model_path)
+            self._swap(loaded)
+        return self.current
+
+    def acquire(self):
+        """Pin the current model for a new stream"""
+        if self.current is None:
+            raise RuntimeError("No Vosk model loaded")
+        handle = self.current
+        handle.active_streams += 1
+        return handle
+
+    def release(self, handle):
+        """Unpin a model; retired models are dropped after their last stream"""
+        handle.active_streams = max(0, handle.active_streams - 1)
+        if handle.retired and handle.active_streams == 0 and handle in self.draining:
+            self.draining.remove(handle)
+            handle.model = None
+            logger.info(f"🗑️ Released drained model: {handle.name}")
+
+    def get_status(self):
+        """Describe the current and draining models"""
+        return {
+            "current": self._describe(self.current) if self.current else None,
+            "draining": [self._describe(handle) for handle in self.draining],
+            "reloading": self._reload_lock.locked()
+        }
+
+    def _load_model(self, model_path):
+        if not os.path.exists(model_path):
+            logger.error(f"Model not found at {model_path}")
+            raise FileNotFoundError(f"Vosk model not found at {model_path}")
+
+        started = time.perf_counter()
+        logger.info(f"Loading Vosk model from {model_path}")
+        model = vosk.Model(model_path)
+        logger.info(f"✅ Vosk model loaded: {Path(model_path).name} ({time.perf_counter() - started:.1f}s)")
+        return LoadedModel(model, model_path)
+
+    def _swap(self, loaded):
+        previous = self.current
+        self.current = loaded
+        if previous is None:
+            return
+
+        previous.retired = True
+        if previous.active_streams == 0:
+            previous.model = None
+            logger.info(f"🗑️ Released idle model: {previous.name}")
+        else:
+            self.draining.append(previous)
+            logger.info(f"⏳ Draining {previous.name} ({previous.active_streams} active streams)")
+
+    def _describe(self, handle):
+        return {
+            "model_path": handle.model_path,
+            "model_name": handle.name,
+            "active_streams": handle.active_streams,
+            "loaded_at": handle.loaded_at
+        }
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Shared correction cache and vocabulary across STT replicas (optional Redis tier)
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Stored for words the corrector looked at and left alone
+NO_CORRECTION = ""
+
+class InMemoryBackend:
+    """In-process stand-in for Redis with the same batched interface"""
+
+    def __init__(self):
+        self.values = {}
+        self.sorted_sets = {}
+
+    async def get_many(self, keys):
+        now = time.time()
+        results = []
+        for key in keys:
+            entry = self.values.get(key)
+            if entry and (entry[1] is None or entry[1] > now):
+                results.append(entry[0])
+            else:
+                results.append(None)
+        return results
+
+    async def set_many(self, mapping, ttl):
+        expires = time.time() + ttl if ttl else None
+        for key, value in mapping.items():
+            self.values[key] = (value, expires)
+
+    async def set_if_absent(self, key, value, ttl):
+        existing = await self.get_many([key])
+        if existing[0] is not None:
+            return False
+        await self.set_many({key: value}, ttl)
+        return True
+
+    async def delete_many(self, keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    async def incr(self, key):
+        current = (await self.get_many([key]))[0]
+        value = int(current or 0) + 1
+        await self.set_many({key: str(value)}, None)
+        return value
+
+    async def add_terms(self, key, terms, score):
+        members = self.sorted_sets.setdefault(key, {})
+        for term in terms:
+            members.setdefault(term, score)
+
+    async def terms_since(self, key, since):
+        members = self.sorted_sets.get(key, {})
+        return [term for term, score in members.items() if score >= since]
+
+    async def close(self):
+        pass
+
+class RedisBackend:
+    """Redis tier; every call is one round trip (MGET or a pipeline)"""
+
+    def __init__(self, url, socket_timeout=0.05, connect_timeout=0.2):
+        # Optional dependency, only needed when a Redis tier is configured
+        import redis.asyncio as redis_asyncio
+        # Short timeouts: a stalled Redis must never stall transcription
+        self.client = redis_asyncio.from_url(
+            url,
+            decode_responses=True,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=connect_timeout
+        )
+
+    async def get_many(self, keys):
+        if not keys:
+            return []
+        return await self.client.mget(keys)
+
+    async def set_many(self, mapping, ttl):
+        if not mapping:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=ttl)
+            await pipe.execute()
+
+    async def set_if_absent(self, key, value, ttl):
+        return bool(await self.client.set(key, value, ex=ttl, nx=True))
+
+    async def delete_many(self, keys):
+        if keys:
+            await self.client.delete(*keys)
+
+    async def incr(self, key):
+        return await self.client.incr(key)
+
+    async def add_terms(self, key, terms, score):
+        if not terms:
+            return
+        # NX keeps the first-seen score so incremental pulls stay cheap
+        await self.client.zadd(key, {term: score for term in terms}, nx=True)
+
+    async def terms_since(self, key, since):
+        return await self.client.zrangebyscore(key, since, "+inf")
+
+    async def close(self):
+        await self.client.close()
+
+class SharedCorrectionCache:
+    """Local LRU (L1) in front of an optional shared backend (L2)"""
+
+    def __init__(self, backend=None, namespace="stt", max_local=50000, ttl=3600,
+                 flush_interval=0.5, sync_interval=30.0, timeout=0.05, retry_after=5.0):
+        self.backend = backend
+        self.namespace = namespace
+        self.max_local = max_local
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+
+        # Circuit breaker: after an L2 failure or timeout, serve from L1 only for a while
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._l2_down_until = 0.0
+
+        # Keys carry the shared vocabulary generation, so bumping it retires every
+        # replica's old L2 entries; L1 entries are also tagged with a local epoch
+        self.generation = 0
+        self.epoch = 0
+        self._bump_pending = False
+
+        self.local = OrderedDict()
+        self.pending_writes = {}
+        self.pending_deletes = set()
+        self.pending_terms = set()
+        self.last_term_sync = 0.0
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "l2_round_trips": 0, "l2_failures": 0}
+
+    @property
+    def shared(self):
+        return self.backend is not None
+
+    @property
+    def l2_available(self):
+        """Backend configured and the circuit breaker closed"""
+        return self.backend is not None and time.monotonic() >= self._l2_down_until
+
+    async def get_many(self, words):
+        """Cached corrections for words; one L2 round trip for all L1 misses"""
+        if self._bump_pending and self.l2_available:
+            await self._publish_generation()
+
+        found = {}
+        misses = []
+        tag = self.current_tag()
+        for word in words:
+            entry = self.local.get(word)
+            if entry is not None and entry[0] == tag:
+                self.local.move_to_end(word)
+                found[word] = entry[1]
+            else:
+                misses.append(word)
+        self.stats["l1_hits"] += len(found)
+
+        # Until a bump reaches Redis, L2 still holds the previous generation
+        if misses and self.l2_available and not self._bump_pending:
+            try:
+                self.stats["l2_round_trips"] += 1
+                values = await asyncio.wait_for(
+                    self.backend.get_many([self._key(word) for word in misses]), self.timeout)
+                # Don't promote into L1 if the vocabulary changed during the read
+                promote = tag == self.current_tag()
+                for word, value in zip(misses, values):
+                    if value is not None:
+                        found[word] = value
+                        if promote:
+                            self._remember(word, value)
+                        self.stats["l2_hits"] += 1
+            except Exception as e:
+                self._l2_failed("read", e)
+
+        self.stats["misses"] += len(words) - len(found)
+        return found
+
+    def put_many(self, corrections, tag=None):
+        """Store corrections computed under tag (see current_tag); writes are batched"""
+        # Results computed against an older vocabulary are dropped, not cached
+        if tag is not None and tag != self.current_tag():
+            return
+        for word, value in corrections.items():
+            self._remember(word, value)
+        if self.backend and not self._bump_pending:
+            self.pending_writes.update({self._key(word): value for word, value in corrections.items()})
+
+    def current_tag(self):
+        """Vocabulary version that fresh lookups are computed against"""
+        return (self.generation, self.epoch)
+
+    def share_terms(self, terms):
+        """Queue vocabulary terms for the other replicas"""
+        if self.backend:
+            self.pending_terms.update(terms)
+
+    def bump_generation(self):
+        """Retire all memoized corrections here and, via Redis, on every replica"""
+        self.epoch += 1
+        if self.backend:
+            self._bump_pending = True
+
+    def invalidate_local(self):
+        """Retire this replica's L1 entries only"""
+        self.epoch += 1
+
+    def drop(self, words):
+        """Forget specific memoized words (L1 now, L2 on the next flush)"""
+        for word in words:
+            self.local.pop(word, None)
+            if self.backend:
+                key = self._key(word)
+                self.pending_writes.pop(key, None)
+                self.pending_deletes.add(key)
+
+    async def flush(self):
+        """Write batched corrections and terms in one pipeline each"""
+        if not self.l2_available:
+            # Corrections are only a cache; don't let them pile up while L2 is down
+            self.pending_writes.clear()
+            return
+        if self._bump_pending:
+            await self._publish_generation()
+            if not self.l2_available:
+                return
+        writes, self.pending_writes = self.pending_writes, {}
+        deletes, self.pending_deletes = self.pending_deletes, set()
+        terms, self.pending_terms = self.pending_terms, set()
+        try:
+            if deletes:
+                await self.backend.delete_many(sorted(deletes))
+            if writes:
+                await self.backend.set_many(writes, self.ttl)
+            if terms:
+                await self.backend.add_terms(self._vocab_key(), sorted(terms), time.time())
+        except Exception as e:
+            # Deletes and terms are retried once the breaker closes again
+            self.pending_deletes |= deletes
+            self.pending_terms |= terms
+            self._l2_failed("write", e)
+
+    async def sync_generation(self):
+        """Adopt a generation another replica published"""
+        if not self.l2_available or self._bump_pending:
+            return
+        try:
+            value = (await self.backend.get_many([self._generation_key()]))[0]
+        except Exception as e:
+            self._l2_failed("generation read", e)
+            return
+        if value is not None and int(value) != self.generation:
+            self.generation = int(value)
+            self.pending_writes.clear()
+
+    async def _publish_generation(self):
+        try:
+            self.generation = await asyncio.wait_for(self.backend.incr(self._generation_key()), self.timeout)
+            self._bump_pending = False
+            self.pending_writes.clear()
+        except Exception as e:
+            # Stay on L1 (already invalidated by the epoch) until Redis is back
+            self._l2_failed("generation bump", e)
+
+    async def pull_terms(self):
+        """Terms other replicas shared since the last pull"""
+        if not self.l2_available:
+            return []
+        since = self.last_term_sync
+        self.last_term_sync = time.time()
+        try:
+            # Small overlap so writes racing the previous pull are not missed
+            return await self.backend.terms_since(self._vocab_key(), max(0.0, since - 5.0))
+        except Exception as e:
+            self._l2_failed("vocabulary pull", e)
+            return []
+
+    async def try_claim(self, task, ttl):
+        """Let only one replica run a periodic task (e.g. the trending fetch)"""
+        if not self.l2_available:
+            return True
+        try:
+            return await self.backend.set_if_absent(f"{self.namespace}:lock:{task}", socket.gethostname(), ttl)
+        except Exception as e:
+            self._l2_failed("lock", e)
+            return True
+
+    async def run(self, vocab_manager):
+        """Flush writes and merge shared vocabulary into the local manager"""
+        if not self.backend:
+            return
+        next_sync = 0.0
+        while True:
+            try:
+                await self.flush()
+                await self.sync_generation()
+                now = time.monotonic()
+                if now >= next_sync:
+                    next_sync = now + self.sync_interval
+                    terms = await self.pull_terms()
+                    added = vocab_manager.merge_shared_terms(terms)
+                    if added:
+                        logger.info(f"🔗 Merged {added} shared vocabulary terms")
+            except Exception as e:
+                logger.error(f"Shared cache sync error: {e}")
+            await asyncio.sleep(self.flush_interval)
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            "shared": self.shared,
+            "l2_available": self.l2_available,
+            "generation": self.generation,
+            "local_entries": len(self.local),
+            "pending_writes": len(self.pending_writes)
+        }
+
+    def _l2_failed(self, operation, error):
+        """Open the circuit breaker so L2 is skipped for retry_after seconds"""
+        if self.l2_available:
+            logger.warning(f"⚠️ Shared cache {operation} failed, using local cache for "
+                           f"{self.retry_after:.0f}s: {error!r}")
+        self.stats["l2_failures"] += 1
+        self._l2_down_until = time.monotonic() + self.retry_after
+
+    def _remember(self, word, value):
+        self.local[word] = (self.current_tag(), value)
+        self.local.move_to_end(word)
+        if len(self.local) > self.max_local:
+            self.local.popitem(last=False)
+
+    def _key(self, word):
+        return f"{self.namespace}:corr:{self.generation}:{word}"
+
+    def _generation_key(self):
+        return f"{self.namespace}:vocab_generation"
+
+    def _vocab_key(self):
+        return f"{self.namespace}:vocab"
+
+def create_shared_cache():
+    """Build the cache from env (REDIS_URL or the Node server's REDIS_DB_* settings)"""
+    backend = None
+    mode = os.environ.get("STT_SHARED_CACHE", "auto")
+    url = os.environ.get("REDIS_URL")
+    if not url and os.environ.get("REDIS_DB_HOST"):
+        url = (f"redis://{os.environ['REDIS_DB_HOST']}:{os.environ.get('REDIS_DB_PORT', '6379')}"
+               f"/{os.environ.get('REDIS_DB', '0')}")
+
+    if mode == "memory":
+        backend = InMemoryBackend()
+    elif mode != "off" and url:
+        try:
+            backend = RedisBackend(url, socket_timeout=float(os.environ.get("STT_REDIS_TIMEOUT", "0.05")))
+            logger.info(f"🔗 Shared correction cache using Redis at {url}")
+        except ImportError:
+            logger.warning("⚠️ redis package not installed, using local correction cache only")
+
+    return SharedCorrectionCache(
+        backend=backend,
+        ttl=int(os.environ.get("STT_CACHE_TTL", "3600"))
+    )
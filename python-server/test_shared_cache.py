@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Behaviour tests for the L1/L2 correction cache using the in-memory backend
+"""
+import asyncio
+import time
+import unittest
+
+from shared_cache import InMemoryBackend, SharedCorrectionCache, NO_CORRECTION
+
+def run(coro):
+    return asyncio.run(coro)
+
+class FailingBackend(InMemoryBackend):
+    """Backend whose reads raise, counting every attempt"""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    async def get_many(self, keys):
+        self.reads += 1
+        raise ConnectionError("redis down")
+
+class HangingBackend(InMemoryBackend):
+    """Backend whose reads never answer (stalled server)"""
+
+    async def get_many(self, keys):
+        await asyncio.sleep(3600)
+
+class SharedCorrectionCacheTest(unittest.TestCase):
+
+    def test_local_only_read_write(self):
+        cache = SharedCorrectionCache()
+        cache.put_many({"pythn": "python", "hello": NO_CORRECTION})
+        self.assertEqual(run(cache.get_many(["pythn", "hello", "other"])),
+                         {"pythn": "python", "hello": NO_CORRECTION})
+
+    def test_l2_shared_between_replicas(self):
+        backend = InMemoryBackend()
+        first, second = SharedCorrectionCache(backend), SharedCorrectionCache(backend)
+
+        first.put_many({"pythn": "python"})
+        run(first.flush())
+
+        self.assertEqual(run(second.get_many(["pythn"])), {"pythn": "python"})
+        self.assertEqual(second.stats["l2_hits"], 1)
+        # Promoted into the second replica's L1
+        self.assertEqual(run(second.get_many(["pythn"])), {"pythn": "python"})
+        self.assertEqual(second.stats["l2_round_trips"], 1)
+
+    def test_generation_bump_invalidates_l1_and_l2_on_every_replica(self):
+        backend = InMemoryBackend()
+        first, second = SharedCorrectionCache(backend), SharedCorrectionCache(backend)
+
+        first.put_many({"kubeflowx": NO_CORRECTION})
+        run(first.flush())
+        self.assertEqual(run(second.get_many(["kubeflowx"])), {"kubeflowx": NO_CORRECTION})
+
+        # Vocabulary changed on the first replica
+        first.bump_generation()
+        self.assertEqual(run(first.get_many(["kubeflowx"])), {})
+
+        # The second replica picks up the new generation and misses as well
+        run(second.sync_generation())
+        self.assertEqual(run(second.get_many(["kubeflowx"])), {})
+
+    def test_bump_without_backend_invalidates_l1(self):
+        cache = SharedCorrectionCache()
+        cache.put_many({"kubeflowx": NO_CORRECTION})
+        cache.bump_generation()
+        self.assertEqual(run(cache.get_many(["kubeflowx"])), {})
+
+    def test_drop_removes_only_given_words(self):
+        backend = InMemoryBackend()
+        cache = SharedCorrectionCache(backend)
+        cache.put_many({"kubeflowx": NO_CORRECTION, "pythn": "python"})
+        run(cache.flush())
+
+        cache.drop(["kubeflowx"])
+        run(cache.flush())
+
+        self.assertEqual(run(cache.get_many(["kubeflowx", "pythn"])), {"pythn": "python"})
+        other = SharedCorrectionCache(backend)
+        self.assertEqual(run(other.get_many(["kubeflowx"])), {})
+
+    def test_stale_results_are_not_cached(self):
+        cache = SharedCorrectionCache()
+        tag = cache.current_tag()
+        cache.bump_generation()
+        cache.put_many({"kubeflowx": NO_CORRECTION}, tag)
+        self.assertEqual(run(cache.get_many(["kubeflowx"])), {})
+
+    def test_failing_backend_degrades_to_l1_and_opens_breaker(self):
+        backend = FailingBackend()
+        cache = SharedCorrectionCache(backend, retry_after=60)
+        cache.put_many({"pythn": "python"})
+
+        self.assertEqual(run(cache.get_many(["pythn", "kubeflowx"])), {"pythn": "python"})
+        self.assertFalse(cache.l2_available)
+        # Breaker open: no further round trips to the broken backend
+        run(cache.get_many(["kubeflowx"]))
+        self.assertEqual(backend.reads, 1)
+        self.assertEqual(cache.stats["l2_failures"], 1)
+
+    def test_hanging_backend_times_out_to_l1(self):
+        cache = SharedCorrectionCache(HangingBackend(), timeout=0.05)
+        cache.put_many({"pythn": "python"})
+
+        started = time.monotonic()
+        self.assertEqual(run(cache.get_many(["pythn", "kubeflowx"])), {"pythn": "python"})
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertFalse(cache.l2_available)
+
+if __name__ == "__main__":
+    unittest.main()
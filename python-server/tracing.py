@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Opt-in per-utterance stage tracing, exported as Chrome trace / Perfetto JSON
+"""
+import json
+import logging
+import os
+import random
+import re
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+class _NullSpan:
+    """Shared no-op span so disabled tracing costs one method call"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+class NullTracer:
+    """Tracer used when tracing is off"""
+
+    enabled = False
+
+    def span(self, name, tid=1, **args):
+        return NULL_SPAN
+
+NULL_TRACER = NullTracer()
+
+class _Span:
+    def __init__(self, tracer, name, tid, args):
+        self.tracer = tracer
+        self.name = name
+        self.tid = tid
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.start, end, self.tid, self.args)
+        return False
+
+    def set(self, **args):
+        """Attach extra arguments (e.g. text lengths) to the span"""
+        self.args.update(args)
+
+class Tracer:
+    """Collects complete ("X") events for one connection"""
+
+    enabled = True
+
+    # Thread ids used as tracks in the trace viewer
+    THREAD_NAMES = {1: "event-loop", 2: "final-worker"}
+
+    def __init__(self, label, max_events=200000):
+        self.label = label
+        self.max_events = max_events
+        self.events = []
+        self.dropped = 0
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+
+    def span(self, name, tid=1, **args):
+        return _Span(self, name, tid, args)
+
+    def record(self, name, start_ns, end_ns, tid=1, args=None):
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        self.events.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start_ns - self.origin) / 1000.0,
+            "dur": (end_ns - start_ns) / 1000.0,
+            "pid": self.pid,
+            "tid": tid,
+            "args": args or {}
+        })
+
+    def to_chrome_trace(self):
+        metadata = [{
+            "name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+            "args": {"name": f"stt {self.label}"}
+        }]
+        metadata.extend({
+            "name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+            "args": {"name": name}
+        } for tid, name in self.THREAD_NAMES.items())
+        return {
+            "traceEvents": metadata + self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {"connection": self.label, "dropped_events": self.dropped}
+        }
+
+    def export(self, trace_dir=None):
+        """Write the trace to STT_TRACE_DIR and return the file path"""
+        trace_dir = Path(trace_dir or os.environ.get("STT_TRACE_DIR", "logs/traces"))
+        trace_dir.mkdir(parents=True, exist_ok=True)
+        safe_label = re.sub(r'[^\w.-]', '_', self.label)
+        path = trace_dir / f"trace-{safe_label}-{int(time.time())}.json"
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+        logger.info(f"🧵 Trace written: {path} ({len(self.events)} events)")
+        return str(path)
+
+def tracer_for_connection(label):
+    """Sample new connections into tracing at STT_TRACE_SAMPLE_RATE (0-1)"""
+    sample_rate = float(os.environ.get("STT_TRACE_SAMPLE_RATE", "0"))
+    if sample_rate > 0 and random.random() < sample_rate:
+        return Tracer(label)
+    return NULL_TRACER
@@ -1,63 +1,188 @@
 #!/usr/bin/env python3
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import asyncio
+import contextlib
+import hmac
 import websockets
 import json
 import vosk
 import logging
 import os
 import re
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from client_session import ClientSession
+from endpointing import LatencyStats
+from load_governor import LoadGovernor
+from model_manager import ModelManager
+from shared_cache import create_shared_cache
+from tracing import Tracer, NULL_TRACER, tracer_for_connection
+
+# Intelligent components are imported lazily (they pull in rapidfuzz, requests, aiohttp)
+SMART_FEATURES_AVAILABLE = os.environ.get("STT_SMART_FEATURES", "0") == "1"
+DynamicVocabularyManager = None
+ImportProgress = None
+IntelligentCorrector = None
 
-# Import our intelligent components (fallback if not available)
-try:
-    from dynamic_vocabulary_manager import DynamicVocabularyManager
-    from intelligent_corrector import IntelligentCorrector
-    SMART_FEATURES_AVAILABLE = False
-except ImportError as e:
-    SMART_FEATURES_AVAILABLE = False
-    DynamicVocabularyManager = None
-    IntelligentCorrector = None
+def _import_smart_features():
+    """Import the smart correction modules on first use; False if unavailable"""
+    global DynamicVocabularyManager, ImportProgress, IntelligentCorrector, SMART_FEATURES_AVAILABLE
+    if DynamicVocabularyManager is None:
+        try:
+            from dynamic_vocabulary_manager import DynamicVocabularyManager, ImportProgress
+            from intelligent_corrector import IntelligentCorrector
+        except ImportError as e:
+            logger.warning(f"Smart features unavailable: {e}")
+            SMART_FEATURES_AVAILABLE = False
+    return SMART_FEATURES_AVAILABLE
 
 # Configure logging
-logging.info(f"SMART_FEATURES_AVAILABLE {SMART_FEATURES_AVAILABLE}")
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
+logger.info(f"SMART_FEATURES_AVAILABLE {SMART_FEATURES_AVAILABLE}")
 
 # Disable Vosk verbose logging
 vosk.SetLogLevel(-1)
 
+# Markers queued alongside audio for the dual-model final worker
+_FLUSH = object()
+_RESET = object()
+
+def _lower_thread_priority():
+    """Run final decoding below the event loop thread (Linux per-thread nice)"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
 class VoskSTTServer:
     def __init__(self, model_path=None, sample_rate=16000):
         self.sample_rate = sample_rate
         
-        # Auto-detect best available model
+        # Explicit path, then VOSK_MODEL_PATH, then auto-detect best available model
         if model_path is None:
-            model_path = self._find_best_model()
+            model_path = os.environ.get("VOSK_MODEL_PATH") or self._find_best_model()
+        self.initial_model_path = model_path
+        
+        # Models are loaded by load(), possibly after the socket is already bound
+        self.models = ModelManager()
+        self.partial_models = None
+        self.fallback_models = None
+        self.final_executor = None
+        # Audio chunks a dual-model stream may queue for its final decoder before
+        # reading from that client pauses (TCP backpressure instead of unbounded memory)
+        self.final_queue_chunks = int(os.environ.get("STT_FINAL_QUEUE_CHUNKS", "50"))
+        self.ready = asyncio.Event()
+        self.startup_timings = {"imports": time.perf_counter() - _IMPORT_STARTED}
+        self.loading = {"state": "loading", "stage": "pending", "stages_done": 0, "stages_total": 1, "error": None}
+        self._started = time.perf_counter()
         
-        # Check if model exists
-        if not os.path.exists(model_path):
-            logger.error(f"Model not found at {model_path}")
-            raise FileNotFoundError(f"Vosk model not found at {model_path}")
+        # Admission control and degradation under overload
+        self.governor = LoadGovernor()
         
-        # Load Vosk model
-        logger.info(f"Loading Vosk model from {model_path}")
-        self.model = vosk.Model(model_path)
-        self.model_path = model_path
-        logger.info(f"✅ Vosk model loaded: {Path(model_path).name}")
+        # Shared secret for admin commands such as reload_model; unset disables them
+        self.admin_token = os.environ.get("VOSK_ADMIN_TOKEN")
+        if not self.admin_token:
+            logger.info("🔒 VOSK_ADMIN_TOKEN not set, admin commands disabled (SIGHUP still reloads)")
         
         # Store active connections
         self.connections = set()
         
-        # Initialize intelligent components only if using base model
-        if "tech-adapted" not in str(model_path) and SMART_FEATURES_AVAILABLE:
+        # Server-wide "end of speech → final sent" latency
+        self.latency = LatencyStats()
+        
+        self.shared_cache = None
+        self.vocab_manager = None
+        self.corrector = None
+        
+        # Suggestion scoring runs on one low-priority thread, never on the final path
+        self.precompute_suggestions = os.environ.get("STT_PRECOMPUTE_SUGGESTIONS", "0") == "1"
+        self.background_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="stt-background",
+            initializer=_lower_thread_priority
+        )
+        # Fire-and-forget tasks, referenced here so they aren't garbage-collected mid-run
+        self.background_tasks = set()
+    
+    async def load(self):
+        """Load models (in a worker thread) and smart features, then mark the server ready"""
+        loop = asyncio.get_running_loop()
+        model_path = self.initial_model_path
+        partial_model_path = self._find_partial_model(model_path)
+        fallback_model_path = None if partial_model_path else os.environ.get("STT_FALLBACK_MODEL")
+        
+        stages = ["model"]
+        if partial_model_path:
+            stages.append("partial_model")
+        if fallback_model_path:
+            stages.append("fallback_model")
+        stages.append("smart_features")
+        self.loading["stages_total"] = len(stages)
+        
+        try:
+            # Load Vosk model (raises FileNotFoundError if missing)
+            async with self._loading_stage("model"):
+                await loop.run_in_executor(None, self.models.load, model_path)
+            
+            # Optional small model for partials; the main model then only decodes finals
+            if partial_model_path:
+                async with self._loading_stage("partial_model"):
+                    self.partial_models = ModelManager()
+                    await loop.run_in_executor(None, self.partial_models.load, partial_model_path)
+                    self.final_executor = ThreadPoolExecutor(
+                        max_workers=int(os.environ.get("STT_FINAL_WORKERS", os.cpu_count() or 2)),
+                        thread_name_prefix="vosk-final",
+                        initializer=_lower_thread_priority
+                    )
+                logger.info(f"⚡ Dual-model mode: partials from {self.partial_models.current.name}, finals from {self.models.current.name}")
+            
+            # Smaller model new sessions fall back to under heavy load
+            self.fallback_models = self.partial_models
+            if fallback_model_path:
+                async with self._loading_stage("fallback_model"):
+                    self.fallback_models = ModelManager()
+                    await loop.run_in_executor(None, self.fallback_models.load, fallback_model_path)
+            self.governor.fallback_available = self.fallback_models is not None
+            
+            async with self._loading_stage("smart_features"):
+                await self._init_smart_features(model_path)
+        except Exception as e:
+            self.loading["state"] = "failed"
+            self.loading["error"] = str(e)
+            raise
+        
+        self.loading["state"] = "ready"
+        self.ready.set()
+        
+        timings = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.startup_timings.items())
+        logger.info(f"⏱️ Startup breakdown: {timings}")
+        logger.info(f"✅ STT system ready ({time.perf_counter() - self._started:.2f}s after start)")
+    
+    async def _init_smart_features(self, model_path):
+        """Initialize intelligent components only if using base model"""
+        # Import in a worker thread so the heavy modules don't stall the loop
+        smart_features = SMART_FEATURES_AVAILABLE and await asyncio.get_running_loop().run_in_executor(None, _import_smart_features)
+        if "tech-adapted" not in str(model_path) and smart_features:
             logger.info("🧠 Using base model - initializing smart correction...")
             try:
                 self.vocab_manager = DynamicVocabularyManager()
                 self.corrector = None  # Will be initialized async
+                
+                # Correction memo + vocabulary shared across replicas when Redis is configured
+                self.shared_cache = create_shared_cache()
+                self.vocab_manager.shared_cache = self.shared_cache
+                self._spawn(self.shared_cache.run(self.vocab_manager), "shared cache sync")
                 asyncio.create_task(self.vocab_manager.auto_update())
                 logger.info("✅ Smart correction system initialized")
             except Exception as e:
@@ -71,8 +196,43 @@ class VoskSTTServer:
                 logger.info("📝 Using base model without smart features")
             self.vocab_manager = None
             self.corrector = None
-        
-        logger.info("✅ STT system ready")
+    
+    @contextlib.asynccontextmanager
+    async def _loading_stage(self, stage):
+        """Track a startup stage for progress reporting and the timing breakdown"""
+        self.loading["stage"] = stage
+        started = time.perf_counter()
+        yield
+        self.startup_timings[stage] = time.perf_counter() - started
+        self.loading["stages_done"] += 1
+    
+    def get_loading_status(self):
+        """Loading state reported to clients that connect before the model is ready"""
+        return {
+            "state": self.loading["state"],
+            "stage": self.loading["stage"],
+            "progress": round(self.loading["stages_done"] / self.loading["stages_total"], 2),
+            "elapsed_seconds": round(time.perf_counter() - self._started, 1),
+            "error": self.loading["error"]
+        }
+    
+    async def _wait_until_ready(self, websocket):
+        """Send loading progress until the models are ready; False if loading failed"""
+        while not self.ready.is_set():
+            status = self.get_loading_status()
+            await websocket.send(json.dumps({
+                "type": "connection",
+                "status": "loading" if status["state"] != "failed" else "failed",
+                "message": "STT loading - please wait" if status["state"] != "failed" else "STT failed to load",
+                "loading": status
+            }))
+            if status["state"] == "failed":
+                return False
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+        return True
     
     def _find_best_model(self):
         """Find the best available model"""
@@ -91,15 +251,60 @@ class VoskSTTServer:
         # Default fallback
         return "models/vosk-model-small-en-us-0.15"
     
-    def _is_using_custom_model(self):
+    def _find_partial_model(self, model_path):
+        """Pick the partials model for dual-model mode (STT_PARTIAL_MODEL or STT_DUAL_MODEL=1)"""
+        partial_model_path = os.environ.get("STT_PARTIAL_MODEL")
+        if not partial_model_path and os.environ.get("STT_DUAL_MODEL", "0") == "1":
+            partial_model_path = "models/vosk-model-small-en-us-0.15"
+        
+        if not partial_model_path:
+            return None
+        if not os.path.exists(partial_model_path):
+            logger.warning(f"⚠️ Partial model not found at {partial_model_path}, using single-model mode")
+            return None
+        if Path(partial_model_path).resolve() == Path(model_path).resolve():
+            logger.info("📝 Partial model is the main model, using single-model mode")
+            return None
+        return partial_model_path
+    
+    @property
+    def model(self):
+        """Model new connections are created with"""
+        return self.models.current.model
+    
+    @property
+    def model_path(self):
+        """Path of the model new connections are created with"""
+        return self.models.current.model_path
+    
+    def _is_using_custom_model(self, model_path=None):
         """Check if using a custom tech-adapted model"""
-        return "tech-adapted" in str(self.model_path).lower()
+        return "tech-adapted" in str(model_path or self.model_path).lower()
+    
+    async def reload_model(self, model_path=None, tier="final"):
+        """Hot-swap the model; existing streams keep decoding on the old one"""
+        models = self.models
+        if tier == "partial":
+            if not self.partial_models:
+                raise ValueError("Dual-model mode is not enabled")
+            models = self.partial_models
+        
+        logger.info(f"♻️ Reloading {tier} Vosk model from {model_path or models.current.model_path}")
+        handle = await models.reload(model_path)
+        logger.info(f"✅ New connections now use {handle.name}")
+        return handle
+    
+    def _is_admin(self, command):
+        """Check admin credentials; fails closed when VOSK_ADMIN_TOKEN is not configured"""
+        if not self.admin_token:
+            return False
+        return hmac.compare_digest(str(command.get('token', '')).encode(), self.admin_token.encode())
         
     async def initialize_corrector(self):
         """Initialize the corrector asynchronously (only for base models)"""
         if not self.corrector and self.vocab_manager and SMART_FEATURES_AVAILABLE:
             try:
-                self.corrector = IntelligentCorrector(self.vocab_manager)
+                self.corrector = IntelligentCorrector(self.vocab_manager, cache=self.shared_cache)
                 await self.corrector.__aenter__()
                 logger.info("🎯 Intelligent corrector initialized")
             except Exception as e:
@@ -111,104 +316,126 @@ class VoskSTTServer:
         client_id = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
         logger.info(f"✅ New client connected: {client_id}")
         
+        # Connections accepted during a fast start wait for the models to load
+        if not self.ready.is_set():
+            try:
+                if not await self._wait_until_ready(websocket):
+                    await websocket.close(code=1011, reason="STT failed to load")
+                    return
+            except websockets.exceptions.ConnectionClosed:
+                return
+        
         # Initialize corrector if not already done (only for base models)
         if self.vocab_manager:
             await self.initialize_corrector()
         
-        # Add to active connections
-        self.connections.add(websocket)
+        # Admission control: queue or reject new streams when at capacity
+        async def notify_queued(position):
+            await websocket.send(json.dumps({
+                "type": "connection",
+                "status": "queued",
+                "message": "Server busy - waiting for a free slot",
+                "position": position
+            }))
         
-        # Create recognizer for this connection
-        rec = vosk.KaldiRecognizer(self.model, self.sample_rate)
-        rec.SetWords(True)  # Enable word-level timestamps
+        if not await self.governor.admit(on_queued=notify_queued):
+            logger.warning(f"🚫 Rejected {client_id}: server at capacity")
+            try:
+                await websocket.send(json.dumps({
+                    "type": "connection",
+                    "status": "rejected",
+                    "message": "Server at capacity, please try again later",
+                    "load": self.governor.get_status()
+                }))
+                await websocket.close(code=1013, reason="Server at capacity")
+            except websockets.exceptions.ConnectionClosed:
+                pass
+            return
         
-        # Determine model type for client info
-        model_type = "custom-trained" if self._is_using_custom_model() else "base-with-correction"
-        vocab_size = len(self.vocab_manager.get_vocabulary()) if self.vocab_manager else "N/A (custom model)"
+        # Everything after admission is released in the finally block, even if setup fails
+        model_handle = None
+        session = None
         
         try:
+            # Add to active connections
+            self.connections.add(websocket)
+            
+            # Under heavy load new sessions go to the smaller fallback model
+            model_manager = self.models
+            if self.governor.use_fallback_model and self.fallback_models:
+                model_manager = self.fallback_models
+                logger.info(f"🪶 {client_id} using fallback model under load")
+            
+            # Pin the current model so a reload lets this stream drain on it
+            model_handle = model_manager.acquire()
+            
+            # Create recognizer for this connection
+            rec = vosk.KaldiRecognizer(model_handle.model, self.sample_rate)
+            rec.SetWords(True)  # Enable word-level timestamps
+            
+            # Determine model type for client info
+            model_type = "custom-trained" if self._is_using_custom_model(model_handle.model_path) else "base-with-correction"
+            vocab_size = len(self.vocab_manager.tech_terms) if self.vocab_manager else "N/A (custom model)"
+            
+            session = ClientSession(websocket, client_id, model_handle, rec, model_type, self.sample_rate)
+            
+            # Tracing: opt in with ?trace=1&token=..., the start_trace command (both admin
+            # only, since each trace is a file on disk), or STT_TRACE_SAMPLE_RATE
+            query = parse_qs(urlparse(path or "").query)
+            if query.get("trace", ["0"])[0] == "1" and self._is_admin({"token": query.get("token", [""])[0]}):
+                session.tracer = Tracer(client_id)
+            else:
+                session.tracer = tracer_for_connection(client_id)
+            
+            # Session vocabulary from the handshake, e.g. ?vocabulary=trie,memoization
+            if self.vocab_manager and query.get("vocabulary"):
+                terms = [term for value in query["vocabulary"] for term in value.split(",")]
+                session.overlay = self.vocab_manager.create_overlay(terms)
+            
+            # Dual-model mode: small model for live partials, finals decoded off the loop
+            if self.partial_models and model_manager is self.models:
+                session.partial_handle = self.partial_models.acquire()
+                session.partial_rec = vosk.KaldiRecognizer(session.partial_handle.model, self.sample_rate)
+                session.final_queue = asyncio.Queue(maxsize=self.final_queue_chunks)
+                session.final_task = asyncio.create_task(self._final_worker(session))
+            
             # Send connection confirmation
             await websocket.send(json.dumps({
                 "type": "connection",
                 "status": "connected",
                 "message": f"STT ready - {model_type} model",
                 "model_type": model_type,
-                "model_path": str(Path(self.model_path).name),
+                "model_path": model_handle.name,
+                "partial_model_path": session.partial_handle.name if session.partial_handle else None,
                 "vocabulary_size": vocab_size,
+                "low_latency": session.endpointer.get_settings(),
+                "tracing": session.tracer.enabled,
+                "session_vocabulary_size": len(session.overlay) if session.overlay else 0,
                 "features": {
-                    "custom_trained": self._is_using_custom_model(),
+                    "custom_trained": self._is_using_custom_model(model_handle.model_path),
                     "smart_correction": self.vocab_manager is not None,
                     "auto_learning": self.vocab_manager is not None
                 }
             }))
             
-            logger.info(f"🎤 Client {client_id} ready - Model: {Path(self.model_path).name}")
+            logger.info(f"🎤 Client {client_id} ready - Model: {model_handle.name}")
             
             # Keep connection alive and handle messages
             while True:
                 try:
                     # Wait for message with timeout
-                    message = await asyncio.wait_for(websocket.recv(), timeout=60.0)
+                    with session.tracer.span("receive"):
+                        message = await asyncio.wait_for(websocket.recv(), timeout=60.0)
                     
                     if isinstance(message, bytes):
                         # Process audio data
-                        if rec.AcceptWaveform(message):
-                            # Final result
-                            result = json.loads(rec.Result())
-                            if result.get('text'):
-                                original_text = result['text']
-                                
-                                # Apply corrections only if using base model
-                                if self.corrector:
-                                    corrected_text = await self.corrector.correct_text(original_text)
-                                    suggestions = self.corrector.get_correction_suggestions(original_text, limit=3)
-                                else:
-                                    corrected_text = original_text
-                                    suggestions = None
-                                
-                                response = {
-                                    "type": "final",
-                                    "transcript": corrected_text,
-                                    "original": original_text if corrected_text != original_text else None,
-                                    "confidence": result.get('confidence', 0),
-                                    "words": result.get('words', []),
-                                    "suggestions": suggestions if suggestions else None,
-                                    "model_type": model_type
-                                }
-                                
-                                # Add vocabulary info for base models
-                                if self.vocab_manager:
-                                    response["vocabulary_learned"] = len(self.vocab_manager.get_vocabulary())
-                                
-                                await websocket.send(json.dumps(response))
-                                
-                                if corrected_text != original_text:
-                                    logger.info(f"📝 {model_type} correction: '{original_text}' → '{corrected_text}'")
-                                else:
-                                    logger.info(f"📝 Transcript: '{corrected_text}'")
-                        else:
-                            # Partial result
-                            partial = json.loads(rec.PartialResult())
-                            if partial.get('partial'):
-                                original_partial = partial['partial']
-                                
-                                # Apply corrections to partial results (lighter processing)
-                                if self.corrector:
-                                    corrected_partial = await self.corrector.correct_text(original_partial)
-                                else:
-                                    corrected_partial = original_partial
-                                
-                                await websocket.send(json.dumps({
-                                    "type": "partial",
-                                    "transcript": corrected_partial,
-                                    "original": original_partial if corrected_partial != original_partial else None
-                                }))
+                        await self._process_audio(session, message)
                     
                     elif isinstance(message, str):
                         # Handle text commands
                         try:
                             command = json.loads(message)
-                            await self._handle_command(command, websocket, client_id, rec)
+                            await self._handle_command(command, session)
                                 
                         except json.JSONDecodeError:
                             logger.warning(f"⚠️ Invalid JSON command from {client_id}: {message}")
@@ -223,7 +450,7 @@ class VoskSTTServer:
                         }
                         
                         if self.vocab_manager:
-                            ping_data["vocabulary_size"] = len(self.vocab_manager.get_vocabulary())
+                            ping_data["vocabulary_size"] = len(self.vocab_manager.tech_terms)
                         
                         await websocket.send(json.dumps(ping_data))
                         logger.debug(f"🏓 Ping sent to {client_id}")
@@ -249,8 +476,26 @@ class VoskSTTServer:
         except Exception as e:
             logger.error(f"💥 Error with client {client_id}: {e}")
         finally:
-            # Clean up
+            # Clean up (session/model may be missing if setup failed part way)
             self.connections.discard(websocket)
+            if session is not None:
+                # Uploads the client never finished still added terms
+                for progress in session.imports.values():
+                    self.vocab_manager.finish_import(progress)
+                if session.final_task:
+                    session.final_task.cancel()
+                session.rec = None
+                session.overlay = None
+                if session.partial_handle:
+                    session.partial_rec = None
+                    self.partial_models.release(session.partial_handle)
+            if model_handle is not None:
+                model_manager.release(model_handle)
+            self.governor.release()
+            
+            # Exported after the slot and models are released, so an await here can't leak them
+            if session is not None and session.tracer.enabled:
+                await self._export_trace(session)
             logger.info(f"🧹 Cleaned up connection for {client_id}")
             
             # Clean up corrector if this was the last connection
@@ -261,14 +506,253 @@ class VoskSTTServer:
                 except:
                     pass
     
-    async def _handle_command(self, command, websocket, client_id, rec):
+    async def _process_audio(self, session, chunk):
+        """Feed an audio chunk to the recognizer and send partial/final results"""
+        if session.partial_rec is not None:
+            await self._process_audio_dual(session, chunk)
+            return
+        
+        rec = session.rec
+        tracer = session.tracer
+        force_final = session.endpointer.process(chunk)
+        end_of_speech = session.endpointer.end_of_speech
+        
+        started = time.perf_counter()
+        with tracer.span("AcceptWaveform", bytes=len(chunk)):
+            is_final = rec.AcceptWaveform(chunk)
+        self.governor.record_decode(time.perf_counter() - started, self._audio_seconds(chunk))
+        
+        if is_final:
+            # Final result from Kaldi's own endpointer
+            session.endpointer.reset()
+            with tracer.span("Result"):
+                result = json.loads(rec.Result())
+            await self._send_final(session, result, end_of_speech=end_of_speech)
+        elif force_final:
+            # Trailing silence in low-latency mode: flush the utterance now
+            session.endpointer.reset()
+            with tracer.span("FinalResult"):
+                result = json.loads(rec.FinalResult())
+            await self._send_final(session, result, forced=True, end_of_speech=end_of_speech)
+        elif self._partial_due(session):
+            # Partial result
+            with tracer.span("PartialResult"):
+                partial = json.loads(rec.PartialResult())
+            if partial.get('partial'):
+                await self._send_partial(session, partial['partial'])
+    
+    async def _process_audio_dual(self, session, chunk):
+        """Partials from the small model inline; queue the chunk for the final worker"""
+        force_final = session.endpointer.process(chunk)
+        end_of_speech = session.endpointer.end_of_speech
+        await self._queue_final(session, chunk, end_of_speech)
+        
+        if force_final:
+            # Flush both recognizers at the same point in the audio
+            await self._queue_final(session, _FLUSH, end_of_speech)
+            session.endpointer.reset()
+            session.partial_rec.Reset()
+            return
+        
+        # The small model's own finals are discarded; the large model owns finals
+        started = time.perf_counter()
+        with session.tracer.span("AcceptWaveform.partial_model", bytes=len(chunk)):
+            is_final = session.partial_rec.AcceptWaveform(chunk)
+        self.governor.record_decode(time.perf_counter() - started, self._audio_seconds(chunk))
+        if is_final or not self._partial_due(session):
+            return
+        
+        with session.tracer.span("PartialResult"):
+            partial = json.loads(session.partial_rec.PartialResult())
+        if partial.get('partial'):
+            await self._send_partial(session, partial['partial'])
+    
+    async def _queue_final(self, session, item, end_of_speech=None):
+        """Queue work for the final worker, waiting while it is behind (bounded queue)"""
+        # Never wait on a worker that stopped or a client that is gone: the full
+        # queue would block the receive loop and the connection would never clean up
+        if session.closed or session.final_task.done():
+            await session.websocket.close(code=1011, reason="Final decoding stopped")
+            raise RuntimeError("Final decoding stopped for this stream")
+        await session.final_queue.put((item, end_of_speech))
+    
+    async def _final_worker(self, session):
+        """Decode queued audio on the main model in a low-priority thread pool"""
+        loop = asyncio.get_running_loop()
+        while True:
+            item, end_of_speech = await session.final_queue.get()
+            if session.closed:
+                continue  # Keep draining so the receive loop never blocks on a full queue
+            rec = session.rec
+            tracer = session.tracer
+            try:
+                if item is _RESET:
+                    rec.Reset()
+                elif item is _FLUSH:
+                    with tracer.span("FinalResult", tid=2):
+                        result = await loop.run_in_executor(self.final_executor, rec.FinalResult)
+                    await self._send_final(session, json.loads(result), forced=True, end_of_speech=end_of_speech)
+                else:
+                    with tracer.span("AcceptWaveform", tid=2, bytes=len(item), queued=session.final_queue.qsize()):
+                        is_final = await loop.run_in_executor(self.final_executor, self._timed_accept, rec, item)
+                    if is_final:
+                        # Only clear the endpointer if no newer speech arrived meanwhile
+                        if session.endpointer.end_of_speech == end_of_speech:
+                            session.endpointer.reset()
+                        with tracer.span("Result", tid=2):
+                            result = await loop.run_in_executor(self.final_executor, rec.Result)
+                        await self._send_final(session, json.loads(result), end_of_speech=end_of_speech)
+            except websockets.exceptions.ConnectionClosed:
+                session.closed = True
+            except Exception as e:
+                logger.error(f"💥 Final decoding error for {session.client_id}: {e}")
+    
+    def _timed_accept(self, rec, chunk):
+        """AcceptWaveform on a worker thread, reporting decode time to the governor"""
+        started = time.perf_counter()
+        is_final = rec.AcceptWaveform(chunk)
+        self.governor.record_decode(time.perf_counter() - started, self._audio_seconds(chunk))
+        return is_final
+    
+    def _audio_seconds(self, chunk):
+        """Duration of a 16-bit mono PCM chunk"""
+        return len(chunk) / 2 / self.sample_rate
+    
+    async def _send_final(self, session, result, forced=False, end_of_speech=None):
+        """Correct and send a final result"""
+        if not result.get('text'):
+            return
+        
+        original_text = result['text']
+        tracer = session.tracer
+        
+        # Suggestions are computed on request (get_suggestions) or in the background;
+        # the id also tags this final's trace spans so one slow utterance can be isolated
+        utterance_id = session.utterances.add(original_text)
+        
+        # Apply corrections only if using base model (and not shed under load)
+        corrector = self.corrector if self.governor.correction_enabled else None
+        if corrector:
+            with tracer.span("correct_text", kind="final", utterance_id=utterance_id, chars=len(original_text)):
+                corrected_text = await corrector.correct_text(original_text, tracer, session.overlay)
+        else:
+            corrected_text = original_text
+        
+        response = {
+            "type": "final",
+            "utterance_id": utterance_id,
+            "transcript": corrected_text,
+            "original": original_text if corrected_text != original_text else None,
+            "confidence": result.get('confidence', 0),
+            "words": result.get('words', []),
+            "suggestions": None,
+            "model_type": session.model_type
+        }
+        
+        if forced:
+            response["endpoint"] = "silence"
+        
+        # Add vocabulary info for base models
+        if self.vocab_manager:
+            response["vocabulary_learned"] = len(self.vocab_manager.tech_terms)
+        
+        with tracer.span("serialize", utterance_id=utterance_id):
+            payload = json.dumps(response)
+        with tracer.span("send", kind="final", utterance_id=utterance_id, bytes=len(payload)):
+            await session.websocket.send(payload)
+        
+        # Measure turn latency once the final is actually on the wire
+        session.latency.record(end_of_speech, forced)
+        self.latency.record(end_of_speech, forced)
+        
+        if corrector and self.precompute_suggestions:
+            self._spawn(self._get_suggestions(session, utterance_id), f"suggestions for {session.client_id}")
+        
+        if corrected_text != original_text:
+            logger.info(f"📝 {session.model_type} correction: '{original_text}' → '{corrected_text}'")
+        else:
+            logger.info(f"📝 Transcript: '{corrected_text}'")
+    
+    def _spawn(self, coro, description):
+        """Run a background task, keeping a reference and logging its failure"""
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        
+        def _done(task):
+            self.background_tasks.discard(task)
+            if not task.cancelled() and task.exception():
+                logger.error(f"💥 Background task failed ({description}): {task.exception()}")
+        
+        task.add_done_callback(_done)
+        return task
+    
+    def _partial_due(self, session):
+        """Under load, decode and send partials less often (checked before PartialResult)"""
+        interval = self.governor.partial_interval
+        return not interval or time.monotonic() - session.last_partial_at >= interval
+    
+    async def _send_partial(self, session, original_partial):
+        """Correct and send a partial result"""
+        session.last_partial_at = time.monotonic()
+        
+        # Apply corrections to partial results (lighter processing)
+        tracer = session.tracer
+        corrector = self.corrector if self.governor.correction_enabled else None
+        if corrector:
+            with tracer.span("correct_text", kind="partial", chars=len(original_partial)):
+                corrected_partial = await corrector.correct_text(original_partial, tracer, session.overlay)
+        else:
+            corrected_partial = original_partial
+        
+        with tracer.span("serialize"):
+            payload = json.dumps({
+                "type": "partial",
+                "transcript": corrected_partial,
+                "original": original_partial if corrected_partial != original_partial else None
+            })
+        with tracer.span("send", kind="partial", bytes=len(payload)):
+            await session.websocket.send(payload)
+    
+    async def _get_suggestions(self, session, utterance_id):
+        """Suggestions for an utterance, scored off the loop and cached until it expires"""
+        entry = session.utterances.get(utterance_id)
+        if entry is None:
+            return None
+        if entry["suggestions"] is None:
+            corrector = self.corrector
+            if not corrector:
+                return []
+            with session.tracer.span("suggestions", utterance_id=utterance_id):
+                entry["suggestions"] = await asyncio.get_running_loop().run_in_executor(
+                    self.background_executor, corrector.get_correction_suggestions, entry["text"], 3
+                )
+        return entry["suggestions"]
+    
+    async def _export_trace(self, session):
+        """Write the session's trace file off the loop; returns its path or None on failure"""
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.background_executor, session.tracer.export
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to export trace for {session.client_id}: {e}")
+            return None
+    
+    async def _handle_command(self, command, session):
         """Handle WebSocket commands"""
         action = command.get('action')
+        websocket = session.websocket
+        client_id = session.client_id
         
         if action == 'reset':
-            # Reset recognizer
-            rec = vosk.KaldiRecognizer(self.model, self.sample_rate)
-            rec.SetWords(True)
+            # Reset recognizer in place (keeps the model this stream is pinned to)
+            session.endpointer.reset()
+            if session.partial_rec is not None:
+                # Queued audio ahead of the reset still decodes; then the final recognizer resets
+                session.partial_rec.Reset()
+                await self._queue_final(session, _RESET)
+            else:
+                session.rec.Reset()
             await websocket.send(json.dumps({
                 "type": "status",
                 "message": "Recognizer reset"
@@ -281,6 +765,7 @@ class VoskSTTServer:
                 "type": "model_info",
                 "model_path": str(self.model_path),
                 "model_name": Path(self.model_path).name,
+                "partial_model_name": self.partial_models.current.name if self.partial_models else None,
                 "model_type": "custom-trained" if self._is_using_custom_model() else "base-with-correction",
                 "sample_rate": self.sample_rate,
                 "features": {
@@ -291,11 +776,105 @@ class VoskSTTServer:
             }
             
             if self.vocab_manager:
-                model_info["vocabulary_size"] = len(self.vocab_manager.get_vocabulary())
+                model_info["vocabulary_size"] = len(self.vocab_manager.tech_terms)
                 model_info["last_vocab_update"] = self.vocab_manager.last_update
             
             await websocket.send(json.dumps(model_info))
         
+        elif action == 'reload_model':
+            # Hot-swap the model for new connections (admin only)
+            if not self._is_admin(command):
+                await websocket.send(json.dumps({
+                    "type": "error",
+                    "message": "Not authorized to reload model"
+                }))
+                return
+            
+            logger.info(f"♻️ Model reload requested by {client_id}")
+            try:
+                handle = await self.reload_model(command.get('model_path'), command.get('tier', 'final'))
+                await websocket.send(json.dumps({
+                    "type": "status",
+                    "message": f"Model reloaded: {handle.name}",
+                    "models": self.models.get_status(),
+                    "partial_models": self.partial_models.get_status() if self.partial_models else None
+                }))
+            except Exception as e:
+                logger.error(f"❌ Model reload failed: {e}")
+                await websocket.send(json.dumps({
+                    "type": "error",
+                    "message": f"Model reload failed: {e}"
+                }))
+        
+        elif action == 'set_low_latency':
+            # Per-connection server-side silence endpointing
+            session.endpointer.configure(
+                enabled=command.get('enabled'),
+                silence_ms=command.get('silence_ms'),
+                energy_threshold=command.get('energy_threshold')
+            )
+            await websocket.send(json.dumps({
+                "type": "status",
+                "message": "Low-latency settings updated",
+                "low_latency": session.endpointer.get_settings()
+            }))
+            logger.info(f"⚡ Low-latency settings for {client_id}: {session.endpointer.get_settings()}")
+        
+        elif action == 'get_suggestions':
+            utterance_id = command.get('utterance_id')
+            suggestions = await self._get_suggestions(session, utterance_id)
+            await websocket.send(json.dumps({
+                "type": "suggestions",
+                "utterance_id": utterance_id,
+                "suggestions": suggestions,
+                "expired": suggestions is None
+            }))
+        
+        elif action == 'start_trace':
+            # Admin only: every trace ends up as a file in STT_TRACE_DIR
+            if not self._is_admin(command):
+                await websocket.send(json.dumps({
+                    "type": "error",
+                    "message": "Not authorized to start tracing"
+                }))
+                return
+            
+            if not session.tracer.enabled:
+                session.tracer = Tracer(client_id)
+            await websocket.send(json.dumps({
+                "type": "status",
+                "message": "Tracing started"
+            }))
+            logger.info(f"🧵 Tracing enabled for {client_id}")
+        
+        elif action == 'stop_trace':
+            trace_path = await self._export_trace(session) if session.tracer.enabled else None
+            session.tracer = NULL_TRACER
+            await websocket.send(json.dumps({
+                "type": "trace",
+                "path": trace_path
+            }))
+        
+        elif action == 'get_latency_stats':
+            await websocket.send(json.dumps({
+                "type": "latency_stats",
+                "connection": session.latency.summary(),
+                "server": self.latency.summary()
+            }))
+        
+        elif action == 'get_load_status':
+            await websocket.send(json.dumps({
+                "type": "load_status",
+                **self.governor.get_status()
+            }))
+        
+        elif action == 'get_model_status':
+            await websocket.send(json.dumps({
+                "type": "model_status",
+                **self.models.get_status(),
+                "partial_models": self.partial_models.get_status() if self.partial_models else None
+            }))
+        
         elif action == 'retrain_model' and not self._is_using_custom_model():
             # Trigger model retraining (placeholder for future implementation)
             await websocket.send(json.dumps({
@@ -306,22 +885,27 @@ class VoskSTTServer:
         # Handle commands specific to base models with correction
         elif self.vocab_manager:
             if action == 'get_vocabulary_stats':
-                vocab = self.vocab_manager.get_vocabulary()
                 trending = self.vocab_manager.trending_terms.most_common(10)
                 
                 await websocket.send(json.dumps({
                     "type": "vocabulary_stats",
-                    "total_terms": len(vocab),
+                    "total_terms": len(self.vocab_manager.tech_terms),
                     "trending_terms": [{"term": term, "count": count} for term, count in trending],
                     "last_update": self.vocab_manager.last_update
                 }))
             
+            elif action == 'get_cache_stats':
+                await websocket.send(json.dumps({
+                    "type": "cache_stats",
+                    **self.shared_cache.get_stats()
+                }))
+            
             elif action == 'force_vocabulary_update':
                 logger.info(f"🔄 Forcing vocabulary update for {client_id}")
                 await self.vocab_manager.fetch_trending_tech_terms()
                 await websocket.send(json.dumps({
                     "type": "status",
-                    "message": f"Vocabulary updated: {len(self.vocab_manager.get_vocabulary())} terms"
+                    "message": f"Vocabulary updated: {len(self.vocab_manager.tech_terms)} terms"
                 }))
             
             elif action == 'search_terms':
@@ -337,12 +921,81 @@ class VoskSTTServer:
             elif action == 'add_custom_terms':
                 terms = command.get('terms', [])
                 if terms:
-                    self.vocab_manager.add_terms(terms)
+                    valid, added = self.vocab_manager.add_terms_batch(terms)
                     await websocket.send(json.dumps({
                         "type": "status",
-                        "message": f"Added {len(terms)} custom terms"
+                        "message": f"Added {added} custom terms ({valid} of {len(terms)} valid)"
                     }))
                     logger.info(f"📚 Added custom terms: {terms}")
+            
+            elif action == 'set_session_vocabulary':
+                # Terms for this connection only (e.g. from the current interview question)
+                terms = command.get('terms', [])
+                if command.get('replace', True) or session.overlay is None:
+                    session.overlay = self.vocab_manager.create_overlay(terms)
+                else:
+                    session.overlay.add_terms(terms)
+                await websocket.send(json.dumps({
+                    "type": "status",
+                    "message": f"Session vocabulary: {len(session.overlay)} terms",
+                    "session_vocabulary_size": len(session.overlay)
+                }))
+                logger.info(f"📎 Session vocabulary for {client_id}: {len(session.overlay)} terms")
+            
+            elif action == 'clear_session_vocabulary':
+                session.overlay = None
+                await websocket.send(json.dumps({
+                    "type": "status",
+                    "message": "Session vocabulary cleared",
+                    "session_vocabulary_size": 0
+                }))
+            
+            elif action == 'import_terms_chunk':
+                # Chunked glossary upload: {"upload_id", "terms": [...], "final": bool}
+                upload_id = str(command.get('upload_id', 'default'))
+                progress = session.imports.get(upload_id)
+                if progress is None:
+                    progress = session.imports[upload_id] = ImportProgress()
+                    logger.info(f"📥 Glossary upload {upload_id} started by {client_id}")
+                
+                # The correction cache is invalidated once per upload, not once per chunk
+                await self.vocab_manager.import_terms(command.get('terms', []), progress=progress, invalidate=False)
+                if command.get('final'):
+                    self.vocab_manager.finish_import(progress)
+                    del session.imports[upload_id]
+                    logger.info(f"📚 Glossary upload {upload_id} finished: {progress.to_dict()}")
+                
+                await websocket.send(json.dumps({
+                    "type": "import_progress",
+                    "upload_id": upload_id,
+                    **progress.to_dict()
+                }))
+            
+            elif action == 'import_terms_file':
+                # Server-side glossary file under STT_IMPORT_DIR (admin only)
+                import_dir = Path(os.environ.get("STT_IMPORT_DIR", "imports")).resolve()
+                file_path = (import_dir / str(command.get('path', ''))).resolve()
+                if not self._is_admin(command):
+                    await websocket.send(json.dumps({
+                        "type": "error",
+                        "message": "Not authorized to import vocabulary files"
+                    }))
+                elif import_dir not in file_path.parents or not file_path.is_file():
+                    await websocket.send(json.dumps({
+                        "type": "error",
+                        "message": f"Glossary file not found in {import_dir.name}/"
+                    }))
+                else:
+                    async def report(progress):
+                        await websocket.send(json.dumps({
+                            "type": "import_progress",
+                            "path": file_path.name,
+                            **progress.to_dict()
+                        }))
+                    
+                    logger.info(f"📥 Importing glossary {file_path} for {client_id}")
+                    progress = await self.vocab_manager.import_terms_file(file_path, on_progress=report)
+                    await report(progress)
         
         elif action == 'ping':
             # Respond to ping
@@ -351,18 +1004,20 @@ class VoskSTTServer:
                 "timestamp": command.get('timestamp'),
                 "server_info": {
                     "model_type": "custom-trained" if self._is_using_custom_model() else "base-with-correction",
-                    "active_connections": len(self.connections)
+                    "active_connections": len(self.connections),
+                    "load_level": self.governor.get_status()["level_name"]
                 }
             }
             
             if self.vocab_manager:
-                pong_data["server_info"]["vocabulary_size"] = len(self.vocab_manager.get_vocabulary())
+                pong_data["server_info"]["vocabulary_size"] = len(self.vocab_manager.tech_terms)
             
             await websocket.send(json.dumps(pong_data))
 
     async def start_server(self, host="0.0.0.0", port=8765):
         """Start the WebSocket server"""
         logger.info(f"Starting Vosk WebSocket server on {host}:{port}")
+        self.governor.start()
         
         try:
             server = await websockets.serve(
@@ -385,17 +1040,48 @@ class VoskSTTServer:
             logger.error(f"❌ Failed to start server: {e}")
             raise
 
+async def _reload_from_signal(server):
+    """Reload the model in response to SIGHUP"""
+    try:
+        await server.reload_model(os.environ.get("VOSK_MODEL_PATH") or server._find_best_model())
+    except Exception as e:
+        logger.error(f"❌ Model reload failed: {e}")
+
 async def main():
     try:
         # Initialize server
         logger.info("🚀 Initializing Vosk STT Server...")
         server = VoskSTTServer()
         
+        # Fast start binds the port first and loads models in the background
+        fast_start = os.environ.get("STT_FAST_START", "1") == "1"
+        if not fast_start:
+            await server.load()
+        
         # Start WebSocket server
+        bind_started = time.perf_counter()
         websocket_server = await server.start_server()
+        server.startup_timings["bind"] = time.perf_counter() - bind_started
+        logger.info(f"⏱️ Listening {time.perf_counter() - _IMPORT_STARTED:.2f}s after process start")
+        
+        if fast_start:
+            try:
+                await server.load()
+            except Exception:
+                websocket_server.close()
+                raise
         
         logger.info("🎤 Server is ready! Connect your client to ws://localhost:8765")
         
+        # SIGHUP reloads the model (VOSK_MODEL_PATH or best available) without dropping streams
+        def _on_sighup():
+            server._spawn(_reload_from_signal(server), "SIGHUP model reload")
+        
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, _on_sighup)
+        except (NotImplementedError, AttributeError):
+            logger.debug("SIGHUP model reload not supported on this platform")
+        
         # Keep server running indefinitely
         await websocket_server.wait_closed()
         